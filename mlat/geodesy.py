@@ -21,6 +21,7 @@ Utility functions to convert between coordinate systems and calculate distances.
 """
 
 import math
+import numpy
 from . import constants
 
 # WGS84 ellipsoid Earth parameters
@@ -98,3 +99,10 @@ def greatcircle(p0, p1):
 def ecef_distance(p0, p1):
     """Returns the straight-line distance in metres between two ECEF points."""
     return math.sqrt((p0[0] - p1[0])**2 + (p0[1] - p1[1])**2 + (p0[2] - p1[2])**2)
+
+
+# .. but for distances from one point to many points, a single numpy pass wins
+def ecef_distances(p0, points):
+    """Returns the straight-line distances in metres between an ECEF point and
+    each row of an (N,3) array of ECEF points, as a numpy array."""
+    return numpy.sqrt(((points - p0) ** 2).sum(axis=1))
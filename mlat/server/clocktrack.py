@@ -27,6 +27,7 @@ import asyncio
 import functools
 import time
 import logging
+import numpy
 
 import modes.message
 
@@ -81,6 +82,10 @@ class ClockTracker(object):
 
         self.coordinator = coordinator
 
+        # combined peer count above which new pairings between busy receivers
+        # are refused; the sums compared against it are ints, so floor it once
+        self.pair_peer_limit = int(1.5 * config.MAX_PEERS)
+
         # schedule periodic cleanup
         asyncio.get_event_loop().call_later(1.0, self._cleanup)
 
@@ -257,9 +262,10 @@ class ClockTracker(object):
 
         #valid, do some extra bookkeeping before sync stuff
 
-        ac = self.coordinator.tracker.aircraft.get(even_message.address)
+        tracker = self.coordinator.tracker
+        ac = tracker.aircraft.get(even_message.address)
         if ac:
-            ac.last_syncpoint_time = time.monotonic()
+            tracker.syncpoint_created(ac, time.monotonic())
 
         # valid. Create a new sync point.
         if even_time < odd_time:
@@ -364,11 +370,11 @@ class ClockTracker(object):
         k = (r0, r1)
         pairing = self.clock_pairs.get(k)
         if pairing is None:
-            distance = r0.distance[r1]
+            distance = r0.distance_to(r1)
             if distance < 1e3:
                 return False
             if (
-                    r0.sync_peers + r1.sync_peers > 1.5 * config.MAX_PEERS
+                    r0.sync_peers + r1.sync_peers > self.pair_peer_limit
                     and r0.sync_peers > 10 and r1.sync_peers > 10
                     and distance > config.MAX_PEERS_MIN_DISTANCE
                ):
@@ -387,19 +393,52 @@ class ClockTracker(object):
         return pairing.update(address, td0B, td1B, i0, i1, now)
 
     def dump_receiver_state(self):
+        """Returns a tuple (state, pairing_stats) describing the current clock pairings.
+
+        state: map of receiver uuid -> peer uuid -> [pairing sync count, error (us), drift (ppm),
+          peer bad_syncs], for output
+        pairing_stats: a tuple of numpy arrays (slot0, slot1, n, error, bad_syncs0, bad_syncs1)
+          with one element per pairing in state, holding the same values with the two receivers
+          identified by Receiver.slot
+        """
+
         state = {}
+        slot0 = []
+        slot1 = []
+        counts = []
+        errors = []
+        bad_syncs0 = []
+        bad_syncs1 = []
         for (r0, r1), pairing in self.clock_pairs.items():
             if pairing.n < 2:
                 continue
 
+            error = round(pairing.error * 1e6, 1)
+            r0_bad_syncs = round(r0.bad_syncs, 2)
+            r1_bad_syncs = round(r1.bad_syncs, 2)
+
             state.setdefault(r0.uuid, {})[r1.uuid] = [pairing.n,
-                              round(pairing.error * 1e6, 1),
+                              error,
                               round(pairing.drift * 1e6),
-                              round(r1.bad_syncs, 2)]
+                              r1_bad_syncs]
                     #removed: #pairing.ts_peer[-1] - pairing.ts_base[-1]]
             state.setdefault(r1.uuid, {})[r0.uuid] = [pairing.n,
-                              round(pairing.error * 1e6, 1),
+                              error,
                               round(pairing.i_drift * 1e6),
-                              round(r0.bad_syncs, 2)]
+                              r0_bad_syncs]
                     #removed: #pairing.ts_base[-1] - pairing.ts_peer[-1]]
-        return state
+
+            slot0.append(r0.slot)
+            slot1.append(r1.slot)
+            counts.append(pairing.n)
+            errors.append(error)
+            bad_syncs0.append(r0_bad_syncs)
+            bad_syncs1.append(r1_bad_syncs)
+
+        pairing_stats = (numpy.array(slot0, dtype=numpy.intp),
+                         numpy.array(slot1, dtype=numpy.intp),
+                         numpy.array(counts, dtype=numpy.float64),
+                         numpy.array(errors, dtype=numpy.float64),
+                         numpy.array(bad_syncs0, dtype=numpy.float64),
+                         numpy.array(bad_syncs1, dtype=numpy.float64))
+        return state, pairing_stats
@@ -32,12 +32,17 @@ class Connection(object):
     this class as long as they provide methods with equivalent signatures.
     """
 
+    # Cleared by the coordinator if report_mlat_position raises; no further
+    # results are forwarded to the connection after that.
+    mlat_results_ok = True
+
     def request_traffic(self, receiver, icao_set):
         """Request that a receiver starts sending traffic for exactly
         the given set of aircraft only.
 
         receiver: the handle of the concerned receiver
-        icao_set: a set of ICAO addresses (as ints) to send (_not_ copied, don't modify afterwards!)
+        icao_set: a set of ICAO addresses (as ints) to send. This is the receiver's
+          live set and will change after the call returns; copy it if a snapshot is needed.
         """
         raise NotImplementedError
 
@@ -29,6 +29,8 @@ import logging
 import logging.handlers
 import time
 import os
+import concurrent.futures
+import numpy
 from contextlib import closing
 
 from mlat import geodesy, profile, constants
@@ -37,20 +39,46 @@ from mlat.server import tracker, clocksync, clocktrack, mlattrack, util, config
 glogger = logging.getLogger("coordinator")
 random.seed()
 
+# shared peer map for receivers with no clock pairings in the state dump; never modified
+_EMPTY = {}
+
+
+def _replace_file(filename, tmpsuffix, data):
+    """Write data (bytes) to a temporary file with unbuffered writes, then atomically
+    rename it over filename."""
+
+    tmpfile = filename + tmpsuffix
+    fd = os.open(tmpfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+    os.replace(tmpfile, filename)
+
 
 class Receiver(object):
     """Represents a particular connected receiver and the associated
     connection that manages it."""
 
-    def __init__(self, uuid, user, connection, clock, position_llh, privacy, connection_info):
+    __slots__ = ('uuid', 'user', 'connection', 'coordinator', 'clock',
+                 'last_clock_reset', 'clock_reset_counter', 'privacy', 'connection_info', 'dead',
+                 'sync_count', 'sync_peers', 'peer_count', 'last_rate_report',
+                 'tracking', 'adsb_seen', 'sync_interest', 'mlat_interest',
+                 'requested_icaos', 'requested_count',
+                 'offX', 'offY', 'position_llh', 'position', 'fudged_lat', 'fudged_lon',
+                 'slot', 'bad_syncs', 'sync_range_exceeded', 'ntotal')
+
+    def __init__(self, uuid, user, connection, coordinator, clock, position_llh, privacy, connection_info):
         self.uuid = uuid
         self.user = user
         self.connection = connection
+        self.coordinator = coordinator
         self.clock = clock
         self.last_clock_reset = time.monotonic()
         self.clock_reset_counter = 0
-        self.position_llh = position_llh
-        self.position = geodesy.llh2ecef(position_llh)
         self.privacy = privacy
         self.connection_info = connection_info
         self.dead = False
@@ -63,52 +91,105 @@ class Receiver(object):
         self.adsb_seen = set()
         self.sync_interest = set()
         self.mlat_interest = set()
-        self.requested = set()
+        # ICAO addresses in sync_interest or mlat_interest, maintained incrementally
+        # along with how many of those two sets each address appears in
+        self.requested_icaos = set()
+        self.requested_count = {}
         self.offX = 0.016 * random.randrange(-1, 2, 2)
         self.offY = 0.016 * random.randrange(-1, 2, 2)
+        self.set_position(position_llh)
 
-        self.distance = {}
+        # index into the coordinator's inter-station distance matrix,
+        # assigned once the receiver is registered
+        self.slot = None
 
         # Receivers with bad_syncs>0 are not used to calculate positions
         self.bad_syncs = 0
         self.sync_range_exceeded = 0
 
-    def update_interest_sets(self, new_sync, new_mlat, new_adsb):
+        # scratch rate-product total for the tracker's sync selection,
+        # always 0.0 outside Tracker.update_interest
+        self.ntotal = 0.0
 
-        if self.bad_syncs > 2 and len(new_sync) > config.MAX_SYNC_AC / 4:
-            new_sync = set(random.sample(new_sync, k=round(config.MAX_SYNC_AC / 4)))
+    def set_position(self, position_llh):
+        """Update the receiver position, and the fudged position that is published
+        in sync.json."""
 
-        if self.bad_syncs > 0:
-            new_mlat = set()
-
-
-        for added in new_adsb.difference(self.adsb_seen):
-            added.adsb_seen.add(self)
-
-        for removed in self.adsb_seen.difference(new_adsb):
-            removed.adsb_seen.discard(self)
+        self.position_llh = position_llh
+        self.position = geodesy.llh2ecef(position_llh)
 
+        # fudge positions, set retained precision as a fraction of a degree:
+        precision = 20
+        if self.privacy:
+            self.fudged_lat = None
+            self.fudged_lon = None
+        else:
+            self.fudged_lat = round(round(position_llh[0] * precision) / precision + self.offX, 2)
+            self.fudged_lon = round(round(position_llh[1] * precision) / precision + self.offY, 2)
 
-        for added in new_sync.difference(self.sync_interest):
-            added.sync_interest.add(self)
+    def update_interest_sets(self, new_sync, new_mlat, new_adsb):
 
-        for removed in self.sync_interest.difference(new_sync):
-            removed.sync_interest.discard(self)
+        if self.bad_syncs > 2 and len(new_sync) > config.MAX_SYNC_AC / 4:
+            new_sync = util.sample_set(new_sync, round(config.MAX_SYNC_AC / 4))
 
-        for added in new_mlat.difference(self.mlat_interest):
-            added.mlat_interest.add(self)
+        if self.bad_syncs > 0:
+            new_mlat = set()
 
-        for removed in self.mlat_interest.difference(new_mlat):
-            removed.mlat_interest.discard(self)
 
-        self.adsb_seen = new_adsb
-        self.sync_interest = new_sync
-        self.mlat_interest = new_mlat
+        # one pass over the symmetric difference of old and new for each set,
+        # then update the old set in place (old ^ changed == new)
+        changed = self.adsb_seen ^ new_adsb
+        for ac in changed:
+            if ac in new_adsb:
+                ac.adsb_seen.add(self)
+            else:
+                ac.adsb_seen.discard(self)
+        self.adsb_seen ^= changed
+        if changed:
+            self.coordinator.tracker.adsb_seen_changed(changed)
+
+        changed = self.sync_interest ^ new_sync
+        for ac in changed:
+            if ac in new_sync:
+                ac.sync_interest.add(self)
+                self._add_requested(ac.icao)
+            else:
+                ac.sync_interest.discard(self)
+                self._remove_requested(ac.icao)
+        self.sync_interest ^= changed
+
+        changed = self.mlat_interest ^ new_mlat
+        for ac in changed:
+            if ac in new_mlat:
+                ac.mlat_interest.add(self)
+                self._add_requested(ac.icao)
+            else:
+                ac.mlat_interest.discard(self)
+                self._remove_requested(ac.icao)
+        self.mlat_interest ^= changed
+
+    def distance_to(self, other):
+        """Returns the distance in metres between this receiver and another
+        registered receiver."""
+        return self.coordinator.receiver_distances[self.slot, other.slot]
+
+    def _add_requested(self, icao):
+        n = self.requested_count.get(icao, 0)
+        self.requested_count[icao] = n + 1
+        if n == 0:
+            self.requested_icaos.add(icao)
+
+    def _remove_requested(self, icao):
+        n = self.requested_count[icao] - 1
+        if n:
+            self.requested_count[icao] = n
+        else:
+            del self.requested_count[icao]
+            self.requested_icaos.discard(icao)
 
     @profile.trackcpu
     def refresh_traffic_requests(self):
-        self.requested = self.sync_interest | self.mlat_interest
-        self.connection.request_traffic(self, {x.icao for x in self.requested})
+        self.connection.request_traffic(self, self.requested_icaos)
 
     def __lt__(self, other):
         return self.uuid < other.uuid
@@ -137,6 +218,11 @@ class Coordinator(object):
 
         self.work_dir = work_dir
         self.receivers = {}    # keyed by uuid
+        # registered receivers, indexed by Receiver.slot, plus the matching
+        # rows of ECEF positions and the symmetric inter-station distance matrix
+        self.receiver_slots = []
+        self.receiver_positions = numpy.empty((16, 3))
+        self.receiver_distances = numpy.zeros((16, 16))
         self.sighup_handlers = []
         self.authenticator = authenticator
         self.partition = partition
@@ -148,6 +234,16 @@ class Coordinator(object):
                                                   pseudorange_filename=pseudorange_filename)
         self.output_handlers = [self.forward_results]
 
+        self._last_proctitle = None
+
+        # state files are serialized and written here, off the event loop.
+        # A single worker keeps the writes in order; write_state waits for each
+        # write before sleeping, so a slow write delays the next one rather than
+        # queueing behind it.
+        self._state_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                     thread_name_prefix='state-writer')
+        self._state_seq = 0
+
         self.receiver_mlat = self.mlat_tracker.receiver_mlat
         self.receiver_sync = self.clock_tracker.receiver_sync
 
@@ -192,31 +288,41 @@ class Coordinator(object):
             handler()
 
     @profile.trackcpu
-    def _really_write_state(self):
+    def _collect_state(self):
+        """Build the contents of the state files and update receiver bad_sync scores.
+        Returns a tuple (sync, locations, aircraft_state) for _write_state_files."""
+
         aircraft_state = {}
         mlat_count = 0
         sync_count = 0
         now = time.time()
+        # this loop runs over every tracked aircraft, so keep lookups local
+        MTOF = constants.MTOF
+        _round = round
+        _len = len
         for ac in self.tracker.aircraft.values():
-            s = aircraft_state['{0:06X}'.format(ac.icao)] = {}
+            s = aircraft_state[ac.icao_hex] = {}
             s['interesting'] = 1 if ac.interesting else 0
             s['allow_mlat'] = 1 if ac.allow_mlat else 0
-            s['tracking'] = len(ac.tracking)
-            s['sync_interest'] = len(ac.sync_interest)
-            s['mlat_interest'] = len(ac.mlat_interest)
-            s['adsb_seen'] = len(ac.adsb_seen)
+            s['tracking'] = _len(ac.tracking)
+            s['sync_interest'] = _len(ac.sync_interest)
+            s['mlat_interest'] = _len(ac.mlat_interest)
+            s['adsb_seen'] = _len(ac.adsb_seen)
             s['mlat_message_count'] = ac.mlat_message_count
             s['mlat_result_count'] = ac.mlat_result_count
             s['mlat_kalman_count'] = ac.mlat_kalman_count
 
-            if ac.last_result_time is not None and ac.kalman.valid:
-                s['last_result'] = round(now - ac.last_result_time, 1)
-                lat, lon, alt = ac.kalman.position_llh
-                s['lat'] = round(lat, 3)
-                s['lon'] = round(lon, 3)
-                s['alt'] = round(alt * constants.MTOF, 0)
-                s['heading'] = round(ac.kalman.heading, 0)
-                s['speed'] = round(ac.kalman.ground_speed, 0)
+            last_result_time = ac.last_result_time
+            if last_result_time is not None:
+                kalman = ac.kalman
+                if kalman.valid:
+                    s['last_result'] = _round(now - last_result_time, 1)
+                    lat, lon, alt = kalman.position_llh
+                    s['lat'] = _round(lat, 3)
+                    s['lon'] = _round(lon, 3)
+                    s['alt'] = _round(alt * MTOF, 0)
+                    s['heading'] = _round(kalman.heading, 0)
+                    s['speed'] = _round(kalman.ground_speed, 0)
 
             if ac.interesting:
                 if ac.sync_interest:
@@ -225,48 +331,86 @@ class Coordinator(object):
                     mlat_count += 1
 
         if self.partition[1] > 1:
-            util.setproctitle('{tag} {i}/{n} ({r} clients) ({m} mlat {s} sync {t} tracked)'.format(
+            title = '{tag} {i}/{n} ({r} clients) ({m} mlat {s} sync {t} tracked)'.format(
                 tag=self.tag,
                 i=self.partition[0],
                 n=self.partition[1],
                 r=len(self.receivers),
                 m=mlat_count,
                 s=sync_count,
-                t=len(self.tracker.aircraft)))
+                t=len(self.tracker.aircraft))
         else:
-            util.setproctitle('{tag} ({r} clients) ({m} mlat {s} sync {t} tracked)'.format(
+            title = '{tag} ({r} clients) ({m} mlat {s} sync {t} tracked)'.format(
                 tag=self.tag,
                 r=len(self.receivers),
                 m=mlat_count,
                 s=sync_count,
-                t=len(self.tracker.aircraft)))
+                t=len(self.tracker.aircraft))
 
-        sync = {}
+        # skip the syscall when nothing changed
+        if title != self._last_proctitle:
+            util.setproctitle(title)
+            self._last_proctitle = title
+
+        # sync.json is streamed out one receiver at a time, so collect (uuid, entry) pairs
+        # rather than building the top-level object
+        sync = []
         locations = {}
 
-        receiver_states = self.clock_tracker.dump_receiver_state()
+        receiver_states, pairing_stats = self.clock_tracker.dump_receiver_state()
+
+        # blacklist receivers with bad clock
+        # note this section of code runs every 30 seconds
 
+        # count how many peers each receiver has bad sync with, over all pairings at once
+        # don't count peers who have been timed out (peer bad_syncs > 0)
+        # 1.5 microseconds error or more are considered a bad sync
+        slot0, slot1, n, error, bad_syncs0, bad_syncs1 = pairing_stats
+        bad_pairing = ((n > 5) & (error > 1.5)) | (error > 4)
+        # each pairing is a peer of both of its receivers
+        owner = numpy.concatenate((slot0, slot1))
+        usable = numpy.concatenate((bad_syncs1 == 0, bad_syncs0 == 0))
+        bad = usable & numpy.concatenate((bad_pairing, bad_pairing))
+        nslots = len(self.receiver_slots)
+        # start with 10 peers extra, so low peer receivers
+        # aren't timed out by the percentage threshold
+        # of bad_peers as easily.
+        all_num_peers = (10 + numpy.bincount(owner, weights=usable, minlength=nslots)).tolist()
+        all_bad_peers = numpy.bincount(owner, weights=bad, minlength=nslots).tolist()
+
+        # one pass over the receivers: update the bad_sync score and produce the output entries
         for r in self.receivers.values():
+            # the state files report the score from before this update
+            bad_syncs = r.bad_syncs
+            num_peers = all_num_peers[r.slot]
+            bad_peers = all_bad_peers[r.slot]
+
+            # If your sync with 5 receivers or more than 10 percent of peers is bad,
+            # it's likely you are the reason.
+            # You get 0.2 to 1 to your bad_sync score and timed out.
 
-            # fudge positions, set retained precision as a fraction of a degree:
-            precision = 20
-            if r.privacy:
-                rlat = None
-                rlon = None
-                ralt = None
+            if bad_peers > 5 or bad_peers/num_peers > 0.1:
+                r.bad_syncs += min(1, 2*bad_peers/num_peers)
             else:
-                rlat = round(round(r.position_llh[0] * precision) / precision + r.offX, 2)
-                rlon = round(round(r.position_llh[1] * precision) / precision + r.offY, 2)
-                ralt = 50 * round(r.position_llh[2]/50)
-
-            sync[r.uuid] = {
-                'peers': receiver_states.setdefault(r.uuid, {}),
-                'bad_syncs': r.bad_syncs,
-                'lat': rlat,
-                'lon': rlon
-            }
+                r.bad_syncs -= 0.1
 
-            r.peer_count = len(sync[r.uuid]['peers'])
+            # If your sync mostly looks good, your bad_sync score is decreased.
+            # If you had a score before, once it goes down to zero you are
+            # no longer timed out
+
+            # Limit bad_sync score to the range of 0 to 6
+
+            r.bad_syncs = max(0, min(6, r.bad_syncs))
+
+            peers = receiver_states.get(r.uuid) or _EMPTY
+            sync.append((r.uuid, {
+                'peers': peers,
+                'bad_syncs': bad_syncs,
+                'lat': r.fudged_lat,
+                'lon': r.fudged_lon
+            }))
+
+            r.peer_count = len(peers)
 
             locations[r.uuid] = {
                 'user': r.user,
@@ -277,82 +421,41 @@ class Coordinator(object):
                 'connection': r.connection_info
             }
 
+        return sync, locations, aircraft_state
+
+    def _write_state_files(self, sync, locations, aircraft_state):
+        """Write out the state files. This runs on the state executor thread."""
+
         # The sync matrix json can be large.  This means it might take a little time to write out.
         # This therefore means someone could start reading it before it has completed writing...
-        # So, write out to a temp file first, and then call os.rename(), which is ATOMIC, to overwrite the real file.
+        # So, write out to a temp file first, and then call os.replace(), which is ATOMIC, to overwrite the real file.
         # (Do this for each file, because why not?)
-        syncfile = self.work_dir + '/sync.json'
-        locationsfile = self.work_dir + '/locations.json'
-        aircraftfile = self.work_dir + '/aircraft.json'
 
-        # This random bit can be used for each file
-        tmprand = str(int(time.time()))
+        # This suffix can be used for each file; it is unique even if we write more than once a second
+        self._state_seq += 1
+        tmpsuffix = '.tmp.{pid}.{seq}'.format(pid=os.getpid(), seq=self._state_seq)
 
-        # sync.json
-        tmpfile = syncfile + '.tmp.' + tmprand
-        with closing(open(tmpfile, 'w')) as f:
-            json.dump(sync, fp=f, indent=None, separators=(',', ':'))
-        # We should probably check for errors here, but let's fire-and-forget, instead...
-        os.rename(tmpfile, syncfile)
+        # sync.json, encoded one receiver at a time
+        encode = json.JSONEncoder(indent=None, separators=(',', ':')).encode
+        data = '{' + ','.join(encode(uuid) + ':' + encode(entry) for uuid, entry in sync) + '}'
+        _replace_file(self.work_dir + '/sync.json', tmpsuffix, data.encode())
 
         # locations.json
-        tmpfile = locationsfile + '.tmp.' + tmprand
-        with closing(open(tmpfile, 'w')) as f:
-            json.dump(locations, fp=f, indent=True)
-        os.rename(tmpfile, locationsfile)
+        data = json.dumps(locations, indent=True)
+        _replace_file(self.work_dir + '/locations.json', tmpsuffix, data.encode())
 
         # aircraft.json
-        tmpfile = aircraftfile + '.tmp.' + tmprand
-        with closing(open(tmpfile, 'w')) as f:
-            json.dump(aircraft_state, fp=f, indent=True)
-        os.rename(tmpfile, aircraftfile)
-
-        # blacklist receivers with bad clock
-        # note this section of code runs every 30 seconds
-        for r in self.receivers.values():
-            bad_peers = 0
-            # count how many peers we have bad sync with
-            # don't count peers who have been timed out (state[4] > 0)
-            # 1.5 microseconds error or more are considered a bad sync (state[1] > 3)
-            num_peers = 10
-            # start with 10 peers extra, so low peer receivers
-            # aren't timed out by the percentage threshold
-            # of bad_peers as easily.
-
-            # iterate over sync state with all peers
-            # state = [ 0: pairing sync count, 1: offset, 2: drift,
-            #           3: bad_syncs ]
-            if 'peers' in sync[r.uuid]:
-                for state in sync[r.uuid]['peers'].values():
-                    if state[3] > 0:
-                        continue
-                    num_peers += 1
-                    if (state[0] > 5 and state[1] > 1.5) or state[1] > 4:
-                        bad_peers += 1
-
-            # If your sync with 5 receivers or more than 10 percent of peers is bad,
-            # it's likely you are the reason.
-            # You get 0.2 to 1 to your bad_sync score and timed out.
-
-            if bad_peers > 5 or bad_peers/num_peers > 0.1:
-                r.bad_syncs += min(1, 2*bad_peers/num_peers)
-            else:
-                r.bad_syncs -= 0.1
-
-            # If your sync mostly looks good, your bad_sync score is decreased.
-            # If you had a score before, once it goes down to zero you are
-            # no longer timed out
-
-            # Limit bad_sync score to the range of 0 to 6
-
-            r.bad_syncs = max(0, min(6, r.bad_syncs))
+        data = json.dumps(aircraft_state, indent=True)
+        _replace_file(self.work_dir + '/aircraft.json', tmpsuffix, data.encode())
 
 
     @asyncio.coroutine
     def write_state(self):
+        loop = asyncio.get_event_loop()
         while True:
             try:
-                self._really_write_state()
+                state = self._collect_state()
+                yield from loop.run_in_executor(self._state_executor, self._write_state_files, *state)
             except Exception:
                 glogger.exception("Failed to write state files")
 
@@ -373,6 +476,7 @@ class Coordinator(object):
         self._write_state_task.cancel()
         if self._write_profile_task:
             self._write_profile_task.cancel()
+        self._state_executor.shutdown(wait=False)
 
     @asyncio.coroutine
     def wait_closed(self):
@@ -389,7 +493,7 @@ class Coordinator(object):
             raise ValueError('User {uuid}/{user} is already connected'.format(uuid=uuid, user=user))
 
         clock = clocksync.make_clock(clock_type)
-        receiver = Receiver(uuid, user, connection, clock,
+        receiver = Receiver(uuid, user, connection, self, clock,
                             position_llh=position_llh,
                             privacy=privacy,
                             connection_info=connection_info)
@@ -397,27 +501,59 @@ class Coordinator(object):
         if self.authenticator is not None:
             self.authenticator(receiver, auth)  # may raise ValueError if authentication fails
 
+        self._assign_receiver_slot(receiver)
         self._compute_interstation_distances(receiver)
 
         self.receivers[receiver.uuid] = receiver
         return receiver
 
+    def _assign_receiver_slot(self, receiver):
+        """give a receiver the next free row of the distance matrix, growing it if needed"""
+
+        n = len(self.receiver_slots)
+        if n == len(self.receiver_positions):
+            positions = numpy.empty((2 * n, 3))
+            positions[:n] = self.receiver_positions
+            distances = numpy.zeros((2 * n, 2 * n))
+            distances[:n, :n] = self.receiver_distances
+            self.receiver_positions = positions
+            self.receiver_distances = distances
+
+        receiver.slot = n
+        self.receiver_slots.append(receiver)
+
+    def _release_receiver_slot(self, receiver):
+        """free a receiver's row of the distance matrix by moving the last receiver into it"""
+
+        slot = receiver.slot
+        last = self.receiver_slots.pop()
+        n = len(self.receiver_slots)
+        if last is not receiver:
+            self.receiver_slots[slot] = last
+            last.slot = slot
+            self.receiver_positions[slot] = self.receiver_positions[n]
+            d = self.receiver_distances
+            d[slot, :n] = d[n, :n]
+            d[:n, slot] = d[:n, n]
+            d[slot, slot] = 0
+
+        receiver.slot = None
+
     def _compute_interstation_distances(self, receiver):
         """compute inter-station distances for a receiver"""
 
-        for other_receiver in self.receivers.values():
-            if other_receiver is receiver:
-                distance = 0
-            else:
-                distance = geodesy.ecef_distance(receiver.position, other_receiver.position)
-            receiver.distance[other_receiver] = distance
-            other_receiver.distance[receiver] = distance
+        n = len(self.receiver_slots)
+        slot = receiver.slot
+        positions = self.receiver_positions
+        positions[slot] = receiver.position
+        distance = geodesy.ecef_distances(positions[slot], positions[:n])
+        self.receiver_distances[slot, :n] = distance
+        self.receiver_distances[:n, slot] = distance
 
     @profile.trackcpu
     def receiver_location_update(self, receiver, position_llh):
         """Note that a given receiver has moved."""
-        receiver.position_llh = position_llh
-        receiver.position = geodesy.llh2ecef(position_llh)
+        receiver.set_position(position_llh)
 
         self._compute_interstation_distances(receiver)
 
@@ -429,10 +565,7 @@ class Coordinator(object):
         self.tracker.remove_all(receiver)
         self.clock_tracker.receiver_disconnect(receiver)
         self.receivers.pop(receiver.uuid)
-
-        # clean up old distance entries
-        for other_receiver in self.receivers.values():
-            other_receiver.distance.pop(receiver, None)
+        self._release_receiver_slot(receiver)
 
     @profile.trackcpu
     def receiver_tracking_add(self, receiver, icao_set):
@@ -440,7 +573,7 @@ class Coordinator(object):
         self.tracker.add(receiver, icao_set)
         if receiver.last_rate_report is None:
             # not receiving rate reports for this receiver
-            self.tracker.update_interest(receiver)
+            self.tracker.schedule_update(receiver)
 
     @profile.trackcpu
     def receiver_tracking_remove(self, receiver, icao_set):
@@ -448,14 +581,22 @@ class Coordinator(object):
         self.tracker.remove(receiver, icao_set)
         if receiver.last_rate_report is None:
             # not receiving rate reports for this receiver
-            self.tracker.update_interest(receiver)
+            self.tracker.schedule_update(receiver)
 
     @profile.trackcpu
     def receiver_clock_reset(self, receiver):
         """Reset current clock synchronization for a receiver."""
-        self.clock_tracker.receiver_clock_reset(receiver)
-        receiver.last_clock_reset = time.monotonic()
+        now = time.monotonic()
+        last_reset = receiver.last_clock_reset
+        receiver.last_clock_reset = now
         receiver.clock_reset_counter += 1
+
+        if receiver.sync_peers == 0 and now - last_reset < 0.1:
+            # flapping receiver: the previous reset dropped all of its pairings
+            # and no new ones have formed since, so skip the pairing scan and log
+            return
+
+        self.clock_tracker.receiver_clock_reset(receiver)
         if receiver.clock_reset_counter < 130 and receiver.clock_reset_counter % 30 == 5:
             glogger.warning("Clock reset: {r} count: {c}".format(r=receiver.uuid, c=receiver.clock_reset_counter))
 
@@ -464,7 +605,7 @@ class Coordinator(object):
     def receiver_rate_report(self, receiver, report):
         """Process an ADS-B position rate report for a receiver."""
         receiver.last_rate_report = report
-        self.tracker.update_interest(receiver)
+        self.tracker.schedule_update(receiver)
 
     @profile.trackcpu
     def forward_results(self, receive_timestamp, address, ecef, ecef_cov, receivers, distinct, dof, kalman_state):
@@ -475,11 +616,17 @@ class Coordinator(object):
             broadcast = ac.successful_mlat
         result_new_old = [ None, None ]
         for receiver in broadcast:
+            connection = receiver.connection
+            if not connection.mlat_results_ok:
+                continue
+
             try:
-                receiver.connection.report_mlat_position(receiver,
-                                                         receive_timestamp, address,
-                                                         ecef, ecef_cov, receivers, distinct,
-                                                         dof, kalman_state, result_new_old)
+                connection.report_mlat_position(receiver,
+                                                receive_timestamp, address,
+                                                ecef, ecef_cov, receivers, distinct,
+                                                dof, kalman_state, result_new_old)
             except Exception:
-                glogger.exception("Failed to forward result to receiver {r}".format(r=receiver.uuid))
-                # eat the exception so it doesn't break our caller
+                glogger.exception("Failed to forward result to receiver {r}, not forwarding any more results".format(
+                    r=receiver.uuid))
+                # eat the exception so it doesn't break our caller, and stop using this connection
+                connection.mlat_results_ok = False
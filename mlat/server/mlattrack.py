@@ -173,6 +173,9 @@ class MlatTracker(object):
         # construct a map of receiver -> list of timestamps
         timestamp_map = {}
         for receiver, timestamp, utc in group.copies:
+            if receiver.dead:
+                # receiver went away before we started resolving this
+                continue
             timestamp_map.setdefault(receiver, []).append((timestamp, utc))
 
         # check for minimum needed receivers
@@ -407,7 +410,7 @@ def _cluster_timestamps(component, min_receivers):
                         can_cluster = False
                         break
 
-                    d = receiver.distance[other_receiver]
+                    d = receiver.distance_to(other_receiver)
                     if abs(other_timestamp - timestamp) > (d * 1.05 + 1e3) / constants.Cair:
                         #glogger.info("   discard: delta {dt:.1f}us > max {m:.1f}us for range {d:.1f}m".format(
                         #    dt=abs(other_timestamp - timestamp)*1e6,
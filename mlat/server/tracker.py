@@ -21,19 +21,70 @@ Maintains state for all aircraft known to some client.
 Works out the set of aircraft we want the clients to send traffic for.
 """
 
-import random
 import asyncio
 import time
+import heapq
+import logging
+from operator import itemgetter
 from mlat import profile
-from mlat.server import kalman, config
+from mlat.server import kalman, config, util
+
+glogger = logging.getLogger("tracker")
+
+# rate products are normalized by 2.25
+_INV_225 = 1.0 / 2.25
+
+
+def _select_sync(sorted_ratepairs, ratepairs, ac_ratepair_range, new_sync, touched, total_rate, limit):
+    """One round of sync aircraft selection for update_interest.
+
+    Walks the (rateproduct, receiver, aircraft, rate) tuples in sorted_ratepairs and
+    adds an aircraft to new_sync if the receiver it pairs with has a rate-product
+    total (receiver.ntotal) below limit, updating the total for every receiver that
+    pairs with that aircraft (the ratepairs[start:end] given by ac_ratepair_range).
+    Receivers whose total becomes nonzero are appended to touched, so the caller
+    can reset them. Stops once the total rate of the selected aircraft exceeds
+    MAX_SYNC_RATE. Returns the new total rate."""
+
+    max_rate = config.MAX_SYNC_RATE
+    new_sync_add = new_sync.add
+    touched_append = touched.append
+    for rp, r1, ac, rate in sorted_ratepairs:
+        if ac in new_sync:
+            continue  # already added
+
+        if total_rate > max_rate:
+            break
+
+        if r1.ntotal < limit:
+            # use this aircraft for sync
+            new_sync_add(ac)
+            total_rate += rate
+            # update rate-product totals for all receivers that see this aircraft
+            start, end = ac_ratepair_range[ac]
+            for rp2, r2, ac2, rate2 in ratepairs[start:end]:
+                if not r2.ntotal:
+                    touched_append(r2)
+                r2.ntotal += rp2
+
+    return total_rate
 
 
 class TrackedAircraft(object):
     """A single tracked aircraft."""
 
+    __slots__ = ('icao', 'icao_hex', 'allow_mlat', 'tracking', 'sync_interest', 'adsb_seen',
+                 'last_syncpoint_time', 'syncpoint_queued', 'mlat_interest', 'successful_mlat',
+                 'mlat_message_count', 'mlat_result_count', 'mlat_kalman_count',
+                 'altitude', 'last_altitude_time',
+                 'last_result_time', 'last_result_position', 'last_result_var', 'last_result_dof',
+                 'last_result_distinct', 'kalman', 'last_kalman_output', 'callsign', 'squawk')
+
     def __init__(self, icao, allow_mlat):
         # ICAO address of this aircraft
         self.icao = icao
+        # ... and as a hex string, for state dumps
+        self.icao_hex = '{0:06X}'.format(icao)
 
         # Allow mlat of this aircraft?
         self.allow_mlat = allow_mlat
@@ -53,6 +104,8 @@ class TrackedAircraft(object):
         # timestamp of when the last sync point was created using this aircraft
         # set this to 3 min in the past, hacky
         self.last_syncpoint_time = time.monotonic() - 180
+        # is there an entry for this aircraft in the tracker's sync point expiry heap?
+        self.syncpoint_queued = False
 
         # set of receivers who want to use this aircraft for multilateration.
         # this aircraft is interesting if this set is non-empty.
@@ -81,6 +134,8 @@ class TrackedAircraft(object):
         self.last_result_position = None
         # last multilateration, variance
         self.last_result_var = None
+        # last multilateration, degrees of freedom
+        self.last_result_dof = None
         # last multilateration, distinct receivers
         self.last_result_distinct = None
         # kalman filter state
@@ -110,10 +165,21 @@ class Tracker(object):
         self.partition_count = partition[1]
         self.coordinator = coordinator
 
-    def in_local_partition(self, icao):
         if self.partition_count == 1:
-            return True
+            # everything is local, skip the hashing
+            self.in_local_partition = lambda icao: True
+
+        # aircraft that receivers should send mlat traffic for: mlat is allowed,
+        # and either fewer than 3 receivers see ADS-B from it or there has been
+        # no recent sync point using it. Maintained incrementally.
+        self.mlat_wanted = set()
+        # heap of (time, icao, aircraft) at which an aircraft's last sync point
+        # goes stale and it should be checked again for mlat_wanted
+        self._syncpoint_expiry = []
+        # receivers waiting for a batched update_interest call, in request order
+        self._pending_updates = {}
 
+    def in_local_partition(self, icao):
         # mix the address a bit
         h = icao
         h = (((h >> 16) ^ h) * 0x45d9f3b) & 0xFFFFFFFF
@@ -126,6 +192,8 @@ class Tracker(object):
             ac = self.aircraft.get(icao)
             if ac is None:
                 ac = self.aircraft[icao] = TrackedAircraft(icao, self.in_local_partition(icao))
+                self._queue_syncpoint_expiry(ac)
+                self._update_mlat_wanted(ac, time.monotonic())
 
             ac.tracking.add(receiver)
             receiver.tracking.add(ac)
@@ -141,8 +209,10 @@ class Tracker(object):
             receiver.tracking.discard(ac)
             if not ac.tracking:
                 del self.aircraft[icao]
+                self.mlat_wanted.discard(ac)
 
     def remove_all(self, receiver):
+        now = time.monotonic()
         for ac in receiver.tracking:
             ac.tracking.discard(receiver)
             ac.successful_mlat.discard(receiver)
@@ -151,11 +221,79 @@ class Tracker(object):
             ac.mlat_interest.discard(receiver)
             if not ac.tracking:
                 del self.aircraft[ac.icao]
+                self.mlat_wanted.discard(ac)
+            else:
+                self._update_mlat_wanted(ac, now)
 
         receiver.tracking.clear()
         receiver.adsb_seen.clear()
         receiver.sync_interest.clear()
         receiver.mlat_interest.clear()
+        receiver.requested_icaos.clear()
+        receiver.requested_count.clear()
+
+    def _update_mlat_wanted(self, ac, now):
+        if ac.allow_mlat and (len(ac.adsb_seen) < 3 or ac.last_syncpoint_time < now - 300):
+            self.mlat_wanted.add(ac)
+        else:
+            self.mlat_wanted.discard(ac)
+
+    def _queue_syncpoint_expiry(self, ac):
+        ac.syncpoint_queued = True
+        heapq.heappush(self._syncpoint_expiry, (ac.last_syncpoint_time + 300, ac.icao, ac))
+
+    def _expire_syncpoints(self, now):
+        """Recheck aircraft whose last sync point may have gone stale."""
+
+        heap = self._syncpoint_expiry
+        while heap and heap[0][0] < now:
+            _, icao, ac = heapq.heappop(heap)
+            if self.aircraft.get(icao) is not ac:
+                continue  # no longer tracked
+
+            if ac.last_syncpoint_time + 300 >= now:
+                # a newer sync point arrived since this entry was queued
+                heapq.heappush(heap, (ac.last_syncpoint_time + 300, icao, ac))
+            else:
+                ac.syncpoint_queued = False
+                self._update_mlat_wanted(ac, now)
+
+    def syncpoint_created(self, ac, now):
+        """Note that a sync point was just created using the given aircraft."""
+
+        ac.last_syncpoint_time = now
+        if not ac.syncpoint_queued:
+            self._queue_syncpoint_expiry(ac)
+        if ac in self.mlat_wanted:
+            self._update_mlat_wanted(ac, now)
+
+    def adsb_seen_changed(self, aircraft):
+        """Note that the adsb_seen sets of the given aircraft have changed."""
+
+        now = time.monotonic()
+        for ac in aircraft:
+            if self.aircraft.get(ac.icao) is ac:
+                self._update_mlat_wanted(ac, now)
+
+    def schedule_update(self, receiver):
+        """Arrange for update_interest to be called for a receiver shortly.
+        Repeated requests before then are coalesced into a single update."""
+
+        if not self._pending_updates:
+            asyncio.get_event_loop().call_later(0.1, self._run_pending_updates)
+        self._pending_updates[receiver] = True
+
+    def _run_pending_updates(self):
+        pending = self._pending_updates
+        self._pending_updates = {}
+        for receiver in pending:
+            if receiver.dead:
+                continue
+
+            try:
+                self.update_interest(receiver)
+            except Exception:
+                glogger.exception("Failed to update interest sets for receiver {r}".format(r=receiver.uuid))
 
     @profile.trackcpu
     def update_interest(self, receiver):
@@ -164,15 +302,16 @@ class Tracker(object):
 
         new_adsb = set()
         now = time.monotonic()
+        self._expire_syncpoints(now)
 
         if receiver.last_rate_report is None:
             # Legacy client, no rate report, we cannot be very selective.
             new_sync = {ac for ac in receiver.tracking}
-            new_mlat = {ac for ac in receiver.tracking if ac.allow_mlat and (len(ac.adsb_seen) < 3 or ac.last_syncpoint_time < now - 300)}
+            new_mlat = receiver.tracking & self.mlat_wanted
             if now - receiver.last_clock_reset < 45:
                 new_sync = set(receiver.tracking)
             elif len(new_sync) > config.MAX_SYNC_AC:
-                new_sync = set(random.sample(new_sync, k=config.MAX_SYNC_AC))
+                new_sync = util.sample_set(new_sync, config.MAX_SYNC_AC)
 
             receiver.update_interest_sets(new_sync, new_mlat, new_adsb)
             asyncio.get_event_loop().call_soon(receiver.refresh_traffic_requests)
@@ -181,91 +320,80 @@ class Tracker(object):
 
         # Work out the aircraft that are transmitting ADS-B that this
         # receiver wants to use for synchronization.
-        ac_to_ratepair_map = {}
+        # (this loop runs over every aircraft in the rate report times every
+        # receiver tracking it, so keep lookups local)
+        # ratepair_list holds (rateproduct, receiver, aircraft, rate) tuples, with
+        # each aircraft's pairs contiguous at the range given by ac_ratepair_range
+        ac_ratepair_range = {}
         ratepair_list = []
-        rate_report_set = set()
+        aircraft_get = self.aircraft.get
+        new_adsb_add = new_adsb.add
+        ratepair_append = ratepair_list.append
         for icao, rate in receiver.last_rate_report.items():
-            ac = self.aircraft.get(icao)
-            if not ac:
-                self.coordinator.receiver_tracking_add(self.receiver, {int(icao, 16)})
-
-            rate_report_set.add(ac)
-
             if rate < 0.25:
                 continue
 
+            ac = aircraft_get(icao)
+            if not ac:
+                # the receiver reported a rate for an aircraft it isn't tracking
+                # (e.g. it was lost in the meantime); nothing to pair it with
+                continue
+
             if rate > 0.5:
-                new_adsb.add(ac)
+                new_adsb_add(ac)
 
-            ac_to_ratepair_map[ac] = l = []  # list of (rateproduct, receiver, ac) tuples for this aircraft
+            start = len(ratepair_list)
+            # rateproduct is rate * rate1 / 2.25, do the per-aircraft part once
+            rate_scaled = rate * _INV_225
             for r1 in ac.tracking:
                 if receiver is r1:
                     continue
 
-                if r1.last_rate_report is None:
+                rr1 = r1.last_rate_report
+                if rr1 is None:
                     # Receiver that does not produce rate reports, just take a guess.
                     rate1 = 0.8
                 else:
-                    rate1 = r1.last_rate_report.get(icao, 0.0)
+                    rate1 = rr1.get(icao, 0.0)
 
-                rp = rate * rate1 / 2.25
+                rp = rate_scaled * rate1
                 if rp < 0.10:
                     continue
 
-                ratepair = (rp, r1, ac, rate)
-                l.append(ratepair)
-                ratepair_list.append(ratepair)
+                ratepair_append((rp, r1, ac, rate))
+
+            ac_ratepair_range[ac] = (start, len(ratepair_list))
 
-        ratepair_list.sort()
+        # order by rateproduct only; equal rateproducts keep their insertion order
+        # rather than falling back to comparing receivers and aircraft
+        sorted_ratepairs = sorted(ratepair_list, key=itemgetter(0))
 
-        ntotal = {}
+        # rate-product totals are accumulated on the receivers themselves;
+        # every receiver with a nonzero total is in touched
+        touched = []
         new_sync = set()
-        total_rate = 0
-
-        # select SYNC aircraft round1
-        for rp, r1, ac, rate in ratepair_list:
-            if ac in new_sync:
-                continue  # already added
-
-            if total_rate > config.MAX_SYNC_RATE:
-                break
-
-            if ntotal.get(r1, 0.0) < 1.0:
-                # use this aircraft for sync
-                new_sync.add(ac)
-                total_rate += rate
-                # update rate-product totals for all receivers that see this aircraft
-                for rp2, r2, ac2, rate in ac_to_ratepair_map[ac]:
-                    ntotal[r2] = ntotal.get(r2, 0.0) + rp2
-
-        # select SYNC aircraft round2 < 2.0 instead of < 1.0 ntotal
-        for rp, r1, ac, rate in ratepair_list:
-            if ac in new_sync:
-                continue  # already added
-
-            if total_rate > config.MAX_SYNC_RATE:
-                break
-
-            if ntotal.get(r1, 0.0) < 2.5:
-                # use this aircraft for sync
-                new_sync.add(ac)
-                total_rate += rate
-                # update rate-product totals for all receivers that see this aircraft
-                for rp2, r2, ac2, rate in ac_to_ratepair_map[ac]:
-                    ntotal[r2] = ntotal.get(r2, 0.0) + rp2
+
+        try:
+            # select SYNC aircraft round1
+            total_rate = _select_sync(sorted_ratepairs, ratepair_list, ac_ratepair_range,
+                                      new_sync, touched, 0, 1.0)
+            # select SYNC aircraft round2 < 2.5 instead of < 1.0 ntotal
+            # (unless round1 already used up the rate budget)
+            if total_rate <= config.MAX_SYNC_RATE:
+                total_rate = _select_sync(sorted_ratepairs, ratepair_list, ac_ratepair_range,
+                                          new_sync, touched, total_rate, 2.5)
+        finally:
+            for r in touched:
+                r.ntotal = 0.0
 
         if now - receiver.last_clock_reset < 45 and len(new_sync) < 10:
-            new_sync = receiver.tracking
+            new_sync = set(receiver.tracking)
 
         # for multilateration we are interesting in
         # all aircraft that we are tracking but for
         # which we have no ADS-B rate (i.e. are not
         # transmitting positions)
-        new_mlat = set()
-
-        for ac in receiver.tracking:
-            if ac.allow_mlat and (len(ac.adsb_seen) < 3 or ac.last_syncpoint_time < now - 300):
-                new_mlat.add(ac)
+        new_mlat = receiver.tracking & self.mlat_wanted
 
         receiver.update_interest_sets(new_sync, new_mlat, new_adsb)
         asyncio.get_event_loop().call_soon(receiver.refresh_traffic_requests)
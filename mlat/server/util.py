@@ -49,6 +49,30 @@ def safe_wait(coros_or_futures, **kwargs):
         return completed_future
 
 
+def sample_set(s, k):
+    """Return a new set of k elements chosen at random from the iterable s
+    (or all of them, if there are no more than k). Unlike random.sample this
+    accepts a set directly and only holds k elements while sampling."""
+
+    if k <= 0:
+        return set()
+
+    it = iter(s)
+    reservoir = []
+    for item in it:
+        reservoir.append(item)
+        if len(reservoir) >= k:
+            break
+
+    randrange = random.randrange
+    for i, item in enumerate(it, start=k):
+        j = randrange(i + 1)
+        if j < k:
+            reservoir[j] = item
+
+    return set(reservoir)
+
+
 class TaggingLogger(logging.LoggerAdapter):
     def process(self, msg, kwargs):
         if 'tag' in self.extra: